@@ -1,16 +1,30 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 import os
+import json
+import hashlib
 import logging
+import queue
+import atexit
+import orjson
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging. Records are queued and written to stderr by a background
+# listener thread, so handler I/O never blocks the event loop.
+logging.logThreads = False
+logging.logProcesses = False
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, logging.StreamHandler())
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(log_queue)])
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # Validate that required environment variables are present
@@ -21,69 +35,116 @@ required_env_vars = [
     "INTERNAL_API_KEY"
 ]
 
-missing_vars = [var for var in required_env_vars if not os.getenv(var)]
+# Read each value once; downstream code should use ENV instead of os.getenv
+ENV = {var: os.getenv(var) for var in required_env_vars}
+missing_vars = [var for var, value in ENV.items() if not value]
 if missing_vars:
     raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
-# Initialize FastAPI app
-app = FastAPI(
-    title="AI Character Communication Platform",
-    description="Secure platform for communicating with AI characters",
-    version="1.0.0",
-)
-
-# Add CORS middleware for frontend integration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=os.getenv("BACKEND_CORS_ORIGINS", ["*"]).strip('[]').replace('"', '').split(", ") if os.getenv("BACKEND_CORS_ORIGINS") else ["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-    # Additional exposed headers for authentication
-    expose_headers=["Access-Control-Allow-Origin"]
-)
+APP_ENVIRONMENT = os.getenv("APP_ENVIRONMENT", "development")
+
+# Parse allowed CORS origins once; the value is a JSON list (see scripts/generate_secrets.py)
+cors_origins_raw = os.getenv("BACKEND_CORS_ORIGINS")
+CORS_ORIGINS = json.loads(cors_origins_raw) if cors_origins_raw else ["*"]
 
 # Exception handlers
-@app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request, exc):
     logger.error(f"Validation error: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={"detail": exc.errors()}
     )
 
-@app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     logger.error(f"HTTP error: {exc.detail}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail}
     )
 
-@app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     logger.error(f"General error: {str(exc)}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"detail": "Internal server error"}
     )
 
+router = APIRouter()
+
+# The health payload only depends on settings read at import, so it is
+# serialized once and its ETag is derived from the encoded body
+HEALTH_BODY = orjson.dumps({
+    "status": "ok",
+    "environment": APP_ENVIRONMENT,
+    "service": "AI Character Communication Platform Backend"
+})
+HEALTH_ETAG = '"' + hashlib.sha256(HEALTH_BODY).hexdigest()[:16] + '"'
+HEALTH_HEADERS = {"ETag": HEALTH_ETAG, "Cache-Control": "max-age=1"}
+
 # Health check endpoint
-@app.get("/api/health", tags=["Health"])
-async def health_check():
+@router.get("/api/health", tags=["Health"])
+async def health_check(request: Request):
     """
     Health check endpoint to verify the application is running properly.
     """
-    return {
-        "status": "ok",
-        "environment": os.getenv("APP_ENVIRONMENT", "development"),
-        "service": "AI Character Communication Platform Backend"
-    }
+    if request.headers.get("if-none-match") == HEALTH_ETAG:
+        return Response(status_code=304, headers=HEALTH_HEADERS)
+    return Response(content=HEALTH_BODY, media_type="application/json", headers=HEALTH_HEADERS)
+
+@lru_cache(maxsize=1)
+def get_app() -> FastAPI:
+    """
+    Build the configured FastAPI application.
+
+    Cached so the server shares a single instance; tests can call
+    get_app.cache_clear() to get a fresh one.
+    """
+    app = FastAPI(
+        title="AI Character Communication Platform",
+        description="Secure platform for communicating with AI characters",
+        version="1.0.0",
+        default_response_class=ORJSONResponse,
+        # Schema and interactive docs are not served in production
+        openapi_url=None if APP_ENVIRONMENT == "production" else "/openapi.json",
+    )
+
+    # Add CORS middleware for frontend integration
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        # Additional exposed headers for authentication
+        expose_headers=["Access-Control-Allow-Origin"]
+    )
+
+    app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.add_exception_handler(HTTPException, http_exception_handler)
+    app.add_exception_handler(Exception, general_exception_handler)
+
+    app.include_router(router)
+    # Additional routes will be included later via include_router
+    # app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
+    # app.include_router(characters.router, prefix="/api/characters", tags=["Characters"])
+
+    return app
 
-# Additional routes will be included later via include_router
-# app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
-# app.include_router(characters.router, prefix="/api/characters", tags=["Characters"])
+app = get_app()
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    debug = os.getenv("DEBUG", "False").lower() == "true"
+    uvicorn.run(
+        "app.main:get_app",
+        factory=True,
+        host="0.0.0.0",
+        port=8000,
+        # uvloop is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        # Auto-reload in development, one worker per CPU otherwise
+        reload=debug,
+        workers=1 if debug else int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+    )
\ No newline at end of file